@@ -3,7 +3,6 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
-import time
 from qdr_core.ingestion import DataIngestion
 from qdr_core.engine import QuantumOptimizer
 
@@ -46,6 +45,21 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# --- Cache de Dados (evita novo download/recálculo a cada rerun do Streamlit) ---
+# Uma única instância por processo (sessão HTTP e pool de threads reaproveitados entre reruns)
+@st.cache_resource
+def get_ingestor() -> DataIngestion:
+    return DataIngestion()
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_prices(tickers: tuple, period: str) -> pd.DataFrame:
+    return get_ingestor().get_historical_data(list(tickers), period=period)
+
+# DataFrames são hasheados pelo conteúdo pelo próprio st.cache_data
+@st.cache_data(show_spinner=False)
+def compute_normalized(df: pd.DataFrame) -> pd.DataFrame:
+    return df / df.iloc[0] * 100
+
 # --- Sidebar: Entrada e Onboarding ---
 st.sidebar.title("⚛️ QDR Config")
 st.sidebar.markdown("---")
@@ -77,17 +91,20 @@ if 'optimized' not in st.session_state:
     st.session_state['optimized'] = False
 if 'optimization_result' not in st.session_state:
     st.session_state['optimization_result'] = None
+if 'optimizer' not in st.session_state:
+    st.session_state['optimizer'] = None
 
 # 1. Ingestão de Dados (Automática ao carregar ou mudar tickers)
 if st.button("🔍 1. Realizar Diagnóstico de Mercado"):
     with st.spinner('Conectando ao Yahoo Finance e baixando dados históricos...'):
-        ingestor = DataIngestion()
         try:
-            df = ingestor.get_historical_data(tickers, period="1y")
+            df = load_prices(tuple(tickers), "1y")
             if df.empty:
                 st.error("Não foi possível obter dados para os ativos informados.")
             else:
                 st.session_state['data'] = df
+                # Retornos, covariância e correlação calculados uma única vez por conjunto de dados
+                st.session_state['optimizer'] = QuantumOptimizer(df)
                 st.session_state['optimized'] = False # Reset optimization if data changes
                 st.success("Dados de mercado atualizados com sucesso!")
         except Exception as e:
@@ -95,6 +112,7 @@ if st.button("🔍 1. Realizar Diagnóstico de Mercado"):
 
 if st.session_state['data'] is not None:
     df = st.session_state['data']
+    optimizer = st.session_state['optimizer']
     
     # Exibir Gráfico de Preços Normalizado
     st.subheader("📊 Diagnóstico: Performance dos Ativos (1 Ano)")
@@ -102,14 +120,14 @@ if st.session_state['data'] is not None:
     tab1, tab2 = st.tabs(["📈 Performance Relativa", "🔥 Mapa de Correlação (Risco)"])
     
     with tab1:
-        normalized_df = df / df.iloc[0] * 100
+        normalized_df = compute_normalized(df)
         fig_perf = px.line(normalized_df, x=normalized_df.index, y=normalized_df.columns, title="Performance Relativa (%)")
         fig_perf.update_layout(template="plotly_dark")
         st.plotly_chart(fig_perf, use_container_width=True)
     
     with tab2:
         st.write("Este mapa mostra o quanto seus ativos 'andam juntos'. Cores quentes (vermelho) indicam alto risco conjunto.")
-        corr_matrix = df.pct_change().corr()
+        corr_matrix = optimizer.corr
         fig_corr = px.imshow(
             corr_matrix, 
             text_auto=True, 
@@ -130,24 +148,9 @@ if st.session_state['data'] is not None:
         st.write("O algoritmo irá buscar o Mínimo Global de risco utilizando Simulated Annealing (processo estocástico inspirado na física).")
         
         if st.button("🚀 Otimizar Agora"):
-            # Animação de "Otimização Estocástica"
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for i in range(100):
-                # Simula etapas do processo
-                if i < 30: status_text.text("Gerando Matriz QUBO...")
-                elif i < 60: status_text.text("Executando Simulated Annealing...")
-                elif i < 90: status_text.text("Convergindo para Mínimo Global...")
-                else: status_text.text("Finalizando Alocação...")
-                time.sleep(0.02) # Fake delay for dramatic effect
-                progress_bar.progress(i + 1)
-            
-            status_text.text("Otimização Completa!")
-            
             # Execução Real
-            optimizer = QuantumOptimizer(df)
-            result = optimizer.optimize_portfolio(risk_aversion=risk_aversion, num_slices=num_slices)
+            with st.spinner('Executando Simulated Annealing...'):
+                result = optimizer.optimize_portfolio(risk_aversion=risk_aversion, num_slices=num_slices)
             
             # Calcular métricas da carteira ATUAL (Equally Weighted para comparação)
             n = len(tickers)
@@ -226,25 +229,11 @@ if st.session_state['data'] is not None:
                 # Fronteira Eficiente (Simulada para Contexto)
                 st.write("O gráfico abaixo mostra onde sua carteira está (🔴) e para onde o QDR a leva (🟢). O objetivo é ir para o canto superior esquerdo (Menor Risco, Maior Retorno).")
                 
-                # Gerar portfólios aleatórios para fundo
+                # Gerar portfólios aleatórios para fundo (todos de uma vez, cálculo vetorizado)
                 num_portfolios = 200
-                all_weights = np.zeros((num_portfolios, len(tickers)))
-                ret_arr = np.zeros(num_portfolios)
-                vol_arr = np.zeros(num_portfolios)
-                sharpe_arr = np.zeros(num_portfolios)
-                
-                # Mock simulation (fast) using optimizer logic
-                for i in range(num_portfolios):
-                    # Random weights
-                    w = np.random.random(len(tickers))
-                    w /= np.sum(w)
-                    all_weights[i,:] = w
-                    
-                    # Metrics
-                    met = optimizer.calculate_portfolio_metrics(dict(zip(tickers, w)))
-                    ret_arr[i] = met['expected_return']
-                    vol_arr[i] = met['volatility']
-                    sharpe_arr[i] = met['sharpe_ratio']
+                all_weights = np.random.default_rng().random((num_portfolios, len(optimizer.tickers)), dtype=np.float32)
+                all_weights /= all_weights.sum(axis=1, keepdims=True)
+                vol_arr, ret_arr, sharpe_arr = optimizer.batch_portfolio_metrics(all_weights)
                 
                 # Create Scatter Plot
                 fig_ef = go.Figure()
@@ -324,4 +313,4 @@ if st.session_state['data'] is not None:
 
 # --- Rodapé ---
 st.markdown("---")
-st.markdown("Desenvolvido com ⚛️ QDR Engine | Powered by PyQUBO & D-Wave Neal")
+st.markdown("Desenvolvido com ⚛️ QDR Engine | Powered by D-Wave Ocean (dimod & Neal)")
@@ -6,8 +6,13 @@ import pandas as pd
 from qdr_core.ingestion import DataIngestion
 from qdr_core.engine import QuantumOptimizer
 import uvicorn
+import asyncio
+import logging
 import os
 
+# INFO in production: per-call DEBUG messages from the ingestion hot paths stay disabled
+logging.basicConfig(level=logging.INFO)
+
 app = FastAPI(
     title="Quantum-Dynamic Rebalancing (QDR) API",
     description="API for quantum-inspired portfolio optimization",
@@ -29,6 +34,9 @@ class OptimizationRequest(BaseModel):
     period: Optional[str] = "1y"
     num_slices: Optional[int] = 20
 
+# Shared across requests so the HTTP session keeps its pooled keep-alive connections
+INGESTOR = DataIngestion()
+
 @app.on_event("startup")
 async def startup_event():
     print("SERVER RESTARTED - OptimizationRequest MODEL")
@@ -52,22 +60,19 @@ def optimize_portfolio(request: OptimizationRequest):
             raise HTTPException(status_code=400, detail="Ticker list cannot be empty")
             
         # 1. Ingestion
-        ingestor = DataIngestion()
+        ingestor = INGESTOR
         # Ensure we have enough data points. Using '1y' default or user provided.
-        # Note: In a real serverless env, caching would be used here.
+        # Repeated (tickers, period) requests are served from DataIngestion's TTL cache.
         prices = ingestor.get_historical_data(tickers, period=request.period)
         
         # Check which tickers were successfully retrieved
         processed_tickers = list(prices.columns)
         missing_tickers = list(set(tickers) - set(processed_tickers))
         
-        # 1.1 Fetch Real-Time Prices (Hybrid Source: Binance/Yahoo)
+        # 1.1 Fetch Real-Time Prices (Hybrid Source: Binance/Yahoo), all tickers concurrently
         real_time_prices = {}
-        for t in processed_tickers:
-            try:
-                real_time_prices[t] = ingestor.get_realtime_price(t)
-            except:
-                real_time_prices[t] = 0.0
+        if processed_tickers:
+            real_time_prices = asyncio.run(ingestor.get_realtime_prices(processed_tickers))
 
         if prices.empty:
             raise HTTPException(status_code=404, detail="No data found for provided tickers. Check symbols (e.g., use PETR4.SA for Brazil).")
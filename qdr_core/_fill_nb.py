@@ -0,0 +1,29 @@
+import math
+from numba import njit
+
+# Serial: a year of bars per column is too little work for prange, and parallel kernels
+# called from several threads at once abort under Numba's workqueue threading layer
+@njit(cache=True)
+def fill2d(arr):
+    """
+    In-place forward fill followed by backward fill of NaNs, column by column.
+    Equivalent to DataFrame.ffill().bfill() but in one traversal per direction
+    without intermediate frames. Pass a Fortran-ordered array so columns are contiguous.
+    """
+    n_rows, n_cols = arr.shape
+    for j in range(n_cols):
+        # Forward: carry the last valid price over gaps (e.g. stocks on weekends)
+        last = math.nan
+        for i in range(n_rows):
+            if math.isnan(arr[i, j]):
+                arr[i, j] = last
+            else:
+                last = arr[i, j]
+
+        # Backward: only leading NaNs remain, fill them with the first valid price
+        nxt = math.nan
+        for i in range(n_rows - 1, -1, -1):
+            if math.isnan(arr[i, j]):
+                arr[i, j] = nxt
+            else:
+                nxt = arr[i, j]
@@ -0,0 +1,44 @@
+import math
+import numpy as np
+from numba import njit
+
+TRADING_DAYS = 252
+
+# No parallel=True: the API and Streamlit invoke this from concurrent worker threads,
+# which the workqueue threading layer does not support; the batch is small anyway
+@njit(cache=True)
+def batch_metrics(W, sigma, mu):
+    """
+    Annualized volatility, expected return and Sharpe ratio for a batch of portfolios.
+
+    Args:
+        W: (num_portfolios, n) matrix, one weight vector per row.
+        sigma: (n, n) daily covariance matrix.
+        mu: (n,) daily mean returns.
+
+    Returns:
+        Tuple of (volatility, expected_return, sharpe_ratio) arrays, one entry per row of W.
+    """
+    num_portfolios, n = W.shape
+    # Outputs follow the input precision (float32 weights give float32 metrics)
+    vol = np.empty(num_portfolios, dtype=W.dtype)
+    ret = np.empty(num_portfolios, dtype=W.dtype)
+    sharpe = np.empty(num_portfolios, dtype=W.dtype)
+    ann_factor = math.sqrt(TRADING_DAYS)
+
+    for p in range(num_portfolios):
+        # Variance = w.T * Sigma * w
+        variance = 0.0
+        expected = 0.0
+        for i in range(n):
+            row = 0.0
+            for j in range(n):
+                row += sigma[i, j] * W[p, j]
+            variance += W[p, i] * row
+            expected += W[p, i] * mu[i]
+
+        vol[p] = math.sqrt(max(variance, 0.0)) * ann_factor
+        ret[p] = expected * TRADING_DAYS
+        sharpe[p] = ret[p] / vol[p] if vol[p] > 0 else 0.0
+
+    return vol, ret, sharpe
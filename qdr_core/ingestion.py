@@ -1,11 +1,122 @@
 import yfinance as yf
+import numpy as np
 import pandas as pd
 import requests
-from typing import List, Optional, Dict, Any
+import asyncio
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import functools
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Dict, Any, Tuple, Callable
+
+try:
+    from qdr_core._fill_nb import fill2d
+except ImportError:  # Numba is optional; pandas ffill/bfill covers it
+    fill2d = None
+
+try:
+    from requests_cache import CachedSession
+except ImportError:  # Optional; a plain requests.Session is used without it
+    CachedSession = None
+
+try:
+    import yfinance_cache as yfc
+except ImportError:  # Optional backend; plain yfinance is used without it
+    yfc = None
+
+logger = logging.getLogger(__name__)
+
+# Root of the on-disk caches; set QDR_CACHE_DIR to move them out of the working directory
+CACHE_DIR = Path(os.environ.get("QDR_CACHE_DIR", ".cache")).expanduser().resolve()
+
+# Seconds a downloaded history stays fresh; short periods move faster
+HISTORY_TTL_SECONDS = {"1d": 60, "5d": 60}
+DEFAULT_HISTORY_TTL_SECONDS = 300
+
+# On-disk copy of downloaded histories (one parquet file per (tickers, period)),
+# kept for a trading day so restarts and new sessions skip the download too
+HISTORY_DISK_CACHE_DIR = CACHE_DIR / "hist"
+HISTORY_DISK_TTL_SECONDS = 24 * 60 * 60
+
+# yf.Ticker objects are reused for a short while: they keep their warmed-up metadata,
+# but also memoize fast_info, so entries must expire to keep quotes fresh
+TICKER_CACHE_TTL_SECONDS = 60
+_TICKER_CACHE: Dict[str, Tuple[float, yf.Ticker]] = {}
+_TICKER_CACHE_LOCK = threading.Lock()
+
+# Upper bound on the memoized Yahoo -> Binance symbol rewrites (tickers come from API clients)
+_MAX_BINANCE_SYMBOLS = 1024
+
+def _get_ticker(ticker: str) -> yf.Ticker:
+    now = time.monotonic()
+    entry = _TICKER_CACHE.get(ticker)
+    if entry is None or now - entry[0] >= TICKER_CACHE_TTL_SECONDS:
+        entry = (now, yf.Ticker(ticker))
+        with _TICKER_CACHE_LOCK:
+            # Drop expired entries on insert, so tickers never requested again do not pile up
+            expired = [t for t, (ts, _) in _TICKER_CACHE.items() if now - ts >= TICKER_CACHE_TTL_SECONDS]
+            for t in expired:
+                del _TICKER_CACHE[t]
+            _TICKER_CACHE[ticker] = entry
+    return entry[1]
+
+@functools.lru_cache(maxsize=1024)
+def _cached_fast_price(ticker: str, bucket: int) -> Optional[float]:
+    # fast_info.last_price is an HTTP call; bucket = current minute, so repeats within it are free
+    return _get_ticker(ticker).fast_info.last_price
+
+# Worker threads for blocking network calls: yfinance lookups and Binance quotes over the pooled session
+FETCH_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
 
 class DataIngestion:
-    def __init__(self):
-        self.session = requests.Session()
+    # Process-wide cache shared by every instance: (tickers, period) -> (timestamp, prices)
+    _history_cache: Dict[Tuple[frozenset, str], Tuple[float, pd.DataFrame]] = {}
+    _history_locks: Dict[Tuple[frozenset, str], threading.Lock] = {}
+    _history_locks_guard = threading.Lock()
+
+    def __init__(self, max_concurrent: int = 8, price_ttl: float = 1.0, tickers: Optional[List[str]] = None):
+        """
+        Args:
+            max_concurrent: Upper bound on in-flight requests in get_realtime_prices,
+                            keeping bursts inside Binance/Yahoo rate limits.
+            price_ttl: Seconds a real-time quote is reused, so bursts of lookups for the
+                       same ticker collapse into one round-trip.
+            tickers: Known ticker universe, used to precompute Binance symbols.
+        """
+        self.max_concurrent = max_concurrent
+        self.price_ttl = price_ttl
+        # ticker -> (price, time.monotonic() at fetch)
+        self._price_cache: Dict[str, Tuple[float, float]] = {}
+        # (time.monotonic() at fetch, {binance symbol: price}) for the bulk ticker endpoint
+        self._binance_snapshot: Optional[Tuple[float, Dict[str, float]]] = None
+        self._price_lock = threading.Lock()
+        # Yahoo "BTC-USD" -> Binance "BTCUSDT", filled up front for known tickers and lazily otherwise
+        self._binance_symbols: Dict[str, str] = {t: t.replace("-USD", "USDT") for t in tickers or []}
+        self.session = self._make_session(price_ttl)
+        # Room for one pooled connection per concurrent price fetch; keep-alive is reused across requests.
+        # Rate limits and transient server errors are retried with a short backoff.
+        retry = Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+        self.session.mount("https://", adapter)
+        # Shared by every blocking fetch (the async price path and yfinance-cache histories), so each
+        # asyncio.run in a request handler reuses these threads and the session's pooled connections
+        self._executor = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS, thread_name_prefix="fetch")
+
+    def _make_session(self, price_ttl: float) -> requests.Session:
+        if CachedSession is not None:
+            # HTTP-level memoization of Binance responses for the same short window as the quote cache.
+            # Best-effort like the history cache: a read-only disk falls back to a plain session.
+            try:
+                return CachedSession(str(CACHE_DIR / "binance"), backend="sqlite", expire_after=price_ttl)
+            except Exception as e:
+                logger.warning("Could not open HTTP cache in %s: %s", CACHE_DIR, e)
+        return requests.Session()
 
     def get_realtime_price(self, ticker: str) -> float:
         """
@@ -14,44 +125,170 @@ class DataIngestion:
         1. Binance API (for Crypto) - Real-time, Free
         2. Yahoo Finance (Fallback) - Real-time for Crypto, 15m delay for Stocks
         """
+        cached = self._cached_price(ticker)
+        if cached is not None:
+            return cached
+
         # 1. Try Binance for Crypto (assuming Yahoo format "BTC-USD" -> Binance "BTCUSDT")
         if "-USD" in ticker:
-            try:
-                symbol = ticker.replace("-USD", "USDT")
-                url = f"https://api.binance.com/api/v3/ticker/price?symbol={symbol}"
-                response = self.session.get(url, timeout=2)
-                if response.status_code == 200:
-                    data = response.json()
-                    print(f"[DataIngestion] Fetched real-time price for {ticker} from Binance: {data['price']}")
-                    return float(data['price'])
-            except Exception as e:
-                print(f"[DataIngestion] Binance fetch failed for {ticker}: {e}")
+            price = self._fetch_binance_one(ticker)
+            if price is not None:
+                return self._store_price(ticker, price)
 
         # 2. Fallback to Yahoo Finance (Fast & Reliable for broad coverage)
+        return self._store_price(ticker, self._fetch_yahoo_one(ticker))
+
+    def get_realtime_prices_crypto(self, tickers: List[str]) -> Dict[str, float]:
+        """
+        Prices several crypto tickers ("BTC-USD" style) with one call to Binance's
+        all-symbols endpoint instead of one request per ticker.
+        Tickers Binance does not list (or a failed request) are left out of the result.
+        """
+        if not tickers:
+            return {}
+        snapshot = self._binance_price_snapshot()
+        if snapshot is None:
+            return {}
+        prices = {}
+        for ticker in tickers:
+            price = snapshot.get(self._binance_symbol(ticker))
+            if price is not None:
+                prices[ticker] = self._store_price(ticker, price)
+        return prices
+
+    def _binance_price_snapshot(self) -> Optional[Dict[str, float]]:
+        with self._price_lock:
+            snapshot = self._binance_snapshot
+        if snapshot is not None and time.monotonic() - snapshot[0] < self.price_ttl:
+            return snapshot[1]
+        try:
+            response = self.session.get("https://api.binance.com/api/v3/ticker/price", timeout=5)
+            if response.status_code != 200:
+                return None
+            prices = {d['symbol']: float(d['price']) for d in response.json()}
+        except Exception as e:
+            logger.warning("Binance bulk fetch failed: %s", e)
+            return None
+        with self._price_lock:
+            self._binance_snapshot = (time.monotonic(), prices)
+        return prices
+
+    def _binance_symbol(self, ticker: str) -> str:
+        symbol = self._binance_symbols.get(ticker)
+        if symbol is None:
+            symbol = ticker.replace("-USD", "USDT")
+            with self._price_lock:
+                if len(self._binance_symbols) >= _MAX_BINANCE_SYMBOLS:
+                    self._binance_symbols.pop(next(iter(self._binance_symbols)), None)
+                self._binance_symbols[ticker] = symbol
+        return symbol
+
+    def _cached_price(self, ticker: str) -> Optional[float]:
+        with self._price_lock:
+            hit = self._price_cache.get(ticker)
+        if hit is not None and time.monotonic() - hit[1] < self.price_ttl:
+            return hit[0]
+        return None
+
+    def _store_price(self, ticker: str, price: float) -> float:
+        # Failed lookups (0.0) are not cached so the next call retries
+        if price:
+            now = time.monotonic()
+            with self._price_lock:
+                # Expired quotes are dropped on insert, keeping the cache to recently seen tickers
+                expired = [t for t, (_, ts) in self._price_cache.items() if now - ts >= self.price_ttl]
+                for t in expired:
+                    del self._price_cache[t]
+                self._price_cache[ticker] = (price, now)
+        return price
+
+    def _fetch_binance_one(self, ticker: str) -> Optional[float]:
+        # Goes through the pooled session: keep-alive connections, and 429/5xx retried with backoff
+        symbol = self._binance_symbol(ticker)
+        url = f"https://api.binance.com/api/v3/ticker/price?symbol={symbol}"
+        try:
+            response = self.session.get(url, timeout=2)
+            if response.status_code == 200:
+                data = response.json()
+                logger.debug("Fetched real-time price for %s from Binance: %s", ticker, data['price'])
+                return float(data['price'])
+        except Exception as e:
+            logger.warning("Binance fetch failed for %s: %s", ticker, e)
+        return None
+
+    def _fetch_yahoo_one(self, ticker: str) -> float:
         try:
-            ticker_obj = yf.Ticker(ticker)
             # Try to get fast info
-            price = ticker_obj.fast_info.last_price
+            price = _cached_fast_price(ticker, int(time.time() // 60))
             if price:
                  return price
             
             # Fallback to history if fast_info fails
-            hist = ticker_obj.history(period="1d")
+            hist = _get_ticker(ticker).history(period="1d")
             if not hist.empty:
                 return hist["Close"].iloc[-1]
                 
         except Exception as e:
-            print(f"[DataIngestion] Yahoo fetch failed for {ticker}: {e}")
+            logger.warning("Yahoo fetch failed for %s: %s", ticker, e)
             
         return 0.0
 
-    def get_historical_data(self, tickers: List[str], period: str = "1y") -> pd.DataFrame:
+    async def get_realtime_prices(self, tickers: List[str]) -> Dict[str, float]:
+        """
+        Concurrent version of get_realtime_price for a list of tickers.
+        Every ticker is fetched at the same time on the shared worker threads (Binance over the
+        pooled HTTP session, Yahoo via yfinance), so a portfolio refresh costs roughly one
+        round-trip instead of one per ticker, on connections kept alive across calls.
+        Sync callers can use asyncio.run(ingestor.get_realtime_prices(tickers)).
+        """
+        # Crypto tickers: a single bulk Binance request prices all of them (and fills the quote cache)
+        crypto = [t for t in tickers if "-USD" in t and self._cached_price(t) is None]
+        binance_covered = False
+        loop = asyncio.get_running_loop()
+        if len(crypto) > 1:
+            snapshot = await loop.run_in_executor(self._executor, self._binance_price_snapshot)
+            if snapshot is not None:
+                self.get_realtime_prices_crypto(crypto)
+                binance_covered = True
+
+        # Created per call: a semaphore is bound to the event loop it is first used on
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        prices = await asyncio.gather(*(self._fetch_realtime_price(semaphore, t, not binance_covered) for t in tickers))
+        return dict(zip(tickers, prices))
+
+    async def _fetch_realtime_price(self, semaphore: asyncio.Semaphore, ticker: str, try_binance: bool = True) -> float:
+        # Same hierarchy (and quote cache) as get_realtime_price: Binance for crypto, Yahoo as fallback
+        cached = self._cached_price(ticker)
+        if cached is not None:
+            return cached
+        if try_binance and "-USD" in ticker:
+            price = await self._run_blocking(semaphore, self._fetch_binance_one, ticker)
+            if price is not None:
+                return self._store_price(ticker, price)
+        return self._store_price(ticker, await self._run_blocking(semaphore, self._fetch_yahoo_one, ticker))
+
+    async def _run_blocking(self, semaphore: asyncio.Semaphore, fetch: Callable[[str], Any], ticker: str) -> Any:
+        # Blocking fetch on the shared executor, keeping the event loop free
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fetch, ticker)
+
+    def get_historical_data(self, tickers: List[str], period: str = "1y", dtype: Any = np.float32,
+                            dtype_backend: Optional[str] = None) -> pd.DataFrame:
         """
         Fetches historical data for a list of tickers.
+        Results are cached in-process for a short TTL, so repeated requests
+        for the same tickers and period skip the Yahoo Finance round-trip.
         
         Args:
             tickers: List of stock/crypto tickers (e.g., ['AAPL', 'BTC-USD']).
             period: Period to download (e.g., '1mo', '3mo', '6mo', '1y', '2y').
+            dtype: Float type of the returned prices. float32 by default, which is plenty
+                   for quotes and halves memory for the downstream covariance math;
+                   the caches keep float64, so np.float64 returns unrounded prices.
+            dtype_backend: "pyarrow" returns Arrow-backed columns (zero-copy handoff to Arrow
+                           consumers). Default None keeps numpy blocks, which QuantumOptimizer
+                           and the Numba kernels expect.
             
         Returns:
             DataFrame containing Close prices.
@@ -59,57 +296,162 @@ class DataIngestion:
         if not tickers:
             return pd.DataFrame()
 
-        print(f"Fetching data for: {tickers}")
-        # Download data
-        # auto_adjust=True usually returns 'Close' as adjusted close
+        key = (frozenset(tickers), period)
+        ttl = HISTORY_TTL_SECONDS.get(period, DEFAULT_HISTORY_TTL_SECONDS)
+
+        cached = self._cached_history(key, ttl)
+        if cached is not None:
+            return self._to_output(cached, dtype, dtype_backend)
+
+        # Coalesce concurrent misses for the same key into a single download
+        with self._history_locks_guard:
+            lock = self._history_locks.setdefault(key, threading.Lock())
+
         try:
-            data = yf.download(tickers, period=period, progress=False, auto_adjust=False)
+            with lock:
+                return self._fill_history(key, tickers, period, ttl, dtype, dtype_backend)
+        finally:
+            # Waiters already hold a reference; later callers hit the cache (or start a new fill)
+            with self._history_locks_guard:
+                if self._history_locks.get(key) is lock:
+                    del self._history_locks[key]
+
+    def _fill_history(self, key: Tuple[frozenset, str], tickers: List[str], period: str, ttl: float,
+                      dtype: Any, dtype_backend: Optional[str]) -> pd.DataFrame:
+        cached = self._cached_history(key, ttl)
+        if cached is not None:
+            return self._to_output(cached, dtype, dtype_backend)
+
+        # Short periods keep their short TTL on disk as well
+        disk_ttl = HISTORY_TTL_SECONDS.get(period, HISTORY_DISK_TTL_SECONDS)
+        path = self._history_cache_path(tickers, period)
+        # Only complete results are cached: a ticker that failed transiently (e.g. a Yahoo
+        # rate limit) must be retried on the next call, not missing for the whole TTL
+        prices = self._read_history_file(path, disk_ttl)
+        if prices is None or set(prices.columns) != key[0]:
+            prices = self._download_historical_data(tickers, period)
+            if set(prices.columns) == key[0]:
+                self._write_history_file(path, prices)
+
+        if set(prices.columns) == key[0]:
+            self._store_history(key, prices)
+        return self._to_output(prices, dtype, dtype_backend)
+
+    def _to_output(self, prices: pd.DataFrame, dtype: Any, dtype_backend: Optional[str] = None) -> pd.DataFrame:
+        # astype hands out a copy, so callers never mutate the cached frame
+        if dtype_backend == "pyarrow":
+            prices = prices.astype(f"{np.dtype(dtype).name}[pyarrow]")
+        else:
+            prices = prices.astype(dtype)
+        # Ticker labels as a categorical index (compact codes instead of repeated string objects).
+        # Applied only on the way out: the parquet cache cannot round-trip categorical columns.
+        prices.columns = pd.CategoricalIndex(prices.columns)
+        return prices
+
+    def _cached_history(self, key: Tuple[frozenset, str], ttl: float) -> Optional[pd.DataFrame]:
+        entry = self._history_cache.get(key)
+        if entry is not None and time.time() - entry[0] < ttl:
+            return entry[1]
+        return None
+
+    def _store_history(self, key: Tuple[frozenset, str], prices: pd.DataFrame) -> None:
+        now = time.time()
+        with self._history_locks_guard:
+            # Drop expired entries on insert so a long-lived worker does not grow without bound
+            expired = [k for k, (ts, _) in self._history_cache.items()
+                       if now - ts >= HISTORY_TTL_SECONDS.get(k[1], DEFAULT_HISTORY_TTL_SECONDS)]
+            for k in expired:
+                del self._history_cache[k]
+            self._history_cache[key] = (now, prices)
+
+    def _history_cache_path(self, tickers: List[str], period: str) -> Path:
+        digest = hashlib.md5(f"{sorted(tickers)}|{period}".encode()).hexdigest()
+        return HISTORY_DISK_CACHE_DIR / f"{digest}.parquet"
+
+    def _read_history_file(self, path: Path, ttl: float) -> Optional[pd.DataFrame]:
+        try:
+            if path.exists() and time.time() - path.stat().st_mtime < ttl:
+                return pd.read_parquet(path)
         except Exception as e:
-            print(f"[DataIngestion] Download failed: {e}")
-            return pd.DataFrame()
+            logger.warning("Could not read history cache %s: %s", path, e)
+        return None
+
+    def _write_history_file(self, path: Path, prices: pd.DataFrame) -> None:
+        # The cache is best-effort: a read-only disk must not break ingestion
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            prices.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning("Could not write history cache %s: %s", path, e)
+
+    def _download_yfc(self, tickers: List[str], period: str) -> Optional[pd.DataFrame]:
+        # One yfc.Ticker per symbol, run on the shared executor so cold misses stay parallel
+        # (yfc.download's own threaded mode spawns a process pool, too heavy inside an API worker).
+        # Columns keep the requested names; yfc.download would upper-case and de-duplicate them.
+        def fetch(ticker: str) -> Optional[pd.Series]:
+            try:
+                close = yfc.Ticker(ticker).history(period=period)["Close"]
+            except Exception as e:
+                logger.warning("yfinance-cache fetch failed for %s: %s", ticker, e)
+                return None
+            # Daily bars come in exchange time; naive dates line up across exchanges
+            if isinstance(close.index, pd.DatetimeIndex) and close.index.tz is not None:
+                close.index = close.index.tz_localize(None)
+            return close
+
+        unique = list(dict.fromkeys(tickers))
+        closes = {t: c for t, c in zip(unique, self._executor.map(fetch, unique)) if c is not None and len(c)}
+        if not closes:
+            logger.warning("yfinance-cache returned no data, falling back to yfinance")
+            return None
+        return pd.DataFrame(closes)
+
+    def _download_historical_data(self, tickers: List[str], period: str) -> pd.DataFrame:
+        logger.debug("Fetching data for: %s", tickers)
+        data = None
+
+        # Preferred backend: yfinance-cache keeps per-ticker daily bars on disk and only fetches
+        # the bars missing since the last call. Its 'Close' is split/dividend adjusted by default.
+        if yfc is not None:
+            data = self._download_yfc(tickers, period)
+
+        if data is None and len(tickers) == 1:
+            # Single ticker: Ticker.history skips the multi-ticker download machinery and returns a
+            # flat frame; its 'Close' is adjusted too, handled below like a single-level download
+            try:
+                data = _get_ticker(tickers[0]).history(period=period, auto_adjust=True)
+            except Exception as e:
+                logger.warning("History fetch failed for %s: %s", tickers[0], e)
+                return pd.DataFrame()
+            # history() keeps the exchange timezone, download() returns naive dates
+            if isinstance(data.index, pd.DatetimeIndex) and data.index.tz is not None:
+                data.index = data.index.tz_localize(None)
+
+        if data is None:
+            # Download data (one request per ticker, run in parallel by yfinance)
+            # auto_adjust=True returns 'Close' already adjusted for splits and dividends
+            try:
+                data = yf.download(tickers, period=period, progress=False, threads=True, auto_adjust=True, group_by='column')
+            except Exception as e:
+                logger.warning("Download failed: %s", e)
+                return pd.DataFrame()
         
-        if data.empty:
+        if data.shape[0] == 0:
             return pd.DataFrame()
 
-        prices = pd.DataFrame()
-
-        # Handle MultiIndex columns (Price Type, Ticker)
+        # Handle MultiIndex columns (Price Type, Ticker): one direct selection of the price block
         if isinstance(data.columns, pd.MultiIndex):
-            # Try to get Adjusted Close, fallback to Close
-            # We need to be careful: sometimes 'Adj Close' is present for some but not others if download is messy
-            
-            # Strategy: Extract 'Adj Close' if available, otherwise 'Close'.
-            # If we have mixed availability, we might need to iterate or prefer Close.
-            
-            # Check if 'Adj Close' is a top-level key
-            if 'Adj Close' in data.columns.levels[0]:
-                prices = data['Adj Close']
-            elif 'Close' in data.columns.levels[0]:
+            try:
                 prices = data['Close']
-            else:
-                # Fallback: look for Close in any level
-                try:
-                    prices = data.xs('Close', axis=1, level=0, drop_level=True)
-                except:
-                    pass
-            
-            # If we still have a MultiIndex (unlikely after selection) or if we missed some tickers:
-            # Let's double check. If 'Adj Close' was selected but some tickers are missing (NaN columns),
-            # we might want to check 'Close' for them. 
-            # For simplicity in this fix, we'll stick to one.
-            
-            # If prices is empty (e.g. neither found), try simple Close
-            if prices.empty and 'Close' in data:
-                 prices = data['Close']
-
+            except KeyError:
+                return pd.DataFrame()
+        elif 'Close' in data:
+            # Single level columns (single ticker): keep it a one-column frame named after the ticker
+            prices = data[['Close']].rename(columns={'Close': tickers[0]})
         else:
-            # Single level columns
-            if 'Adj Close' in data:
-                prices = data['Adj Close']
-            elif 'Close' in data:
-                prices = data['Close']
-            else:
-                prices = data
+            prices = data
 
         # Ensure prices is a DataFrame (if single ticker Series)
         if isinstance(prices, pd.Series):
@@ -118,16 +460,31 @@ class DataIngestion:
         # 1. Drop columns (tickers) that are all NaN (failed downloads or invalid tickers)
         prices = prices.dropna(axis=1, how='all')
         
+        if fill2d is not None:
+            # 2.+3. Forward fill (different trading days, e.g. Crypto vs Stocks) and backward fill
+            # (initial NaNs) in one fused pass per column over a column-major copy
+            values = np.array(prices.to_numpy(), dtype=np.float64, order='F')
+            fill2d(values)
+            
+            # 4. Drop remaining rows with NaNs (if any)
+            mask = ~np.isnan(values).any(axis=1)
+            if not mask.all():
+                values = values[mask]
+            return pd.DataFrame(values, index=prices.index[mask], columns=prices.columns, copy=False)
+
         # 2. Forward fill to handle different trading days (e.g. Crypto vs Stocks)
         prices = prices.ffill()
         
         # 3. Backward fill to handle initial NaNs
         prices = prices.bfill()
         
-        # 4. Drop remaining rows with NaNs (if any)
-        prices = prices.dropna()
+        # 4. Drop remaining rows with NaNs (if any); after the fills there usually are none, so skip the copy
+        mask = ~prices.isna().any(axis=1).to_numpy()
+        if not mask.all():
+            prices = prices.loc[mask]
         
-        return prices
+        # 5. Cached at full precision; get_historical_data downcasts to the caller's dtype on return
+        return prices.astype(np.float64, copy=False)
 
 if __name__ == "__main__":
     # Test